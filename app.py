@@ -2,7 +2,8 @@ import streamlit as st
 import json
 import os
 import pandas as pd
-from scripts.generate_excel import create_quotation
+from concurrent.futures import ThreadPoolExecutor
+from scripts.quotation_jobs import QuotationJob, create_executor, QUICK_WAIT
 from datetime import datetime
 
 # --- Constants ---
@@ -19,6 +20,46 @@ def save_products(products):
     with open(PRODUCTS_FILE, "w", encoding="utf-8") as f:
         json.dump(products, f, ensure_ascii=False, indent=2)
 
+@st.cache_resource
+def get_executor():
+    # One bounded pool per server process, shared by all sessions
+    return create_executor()
+
+@st.cache_resource
+def get_thumbnail_executor():
+    # Kept apart from the quote pool so slow image fetches never hold a quote slot
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+
+def log_thumbnail_failure(future):
+    if not future.cancelled() and future.exception():
+        print(f"Thumbnail build failed: {future.exception()!r}")
+
+def clear_quote_job():
+    # Stops a running job and drops the finished file from session memory
+    job = st.session_state.pop("quote_job", None)
+    if job is not None:
+        job.cancel()
+    st.session_state.pop("quote_inputs", None)
+
+@st.fragment(run_every=0.5)
+def show_job_progress():
+    """Polls the session's quotation job without rerunning the whole page."""
+    job = st.session_state.get("quote_job")
+    if job is None:
+        return
+    if job.done():
+        # Full rerun picks up the finished file
+        st.rerun()
+    
+    if job.future.running():
+        st.progress(job.fraction, text=f"견적서 생성 중... ({int(job.fraction * 100)}%)")
+    else:
+        st.progress(0.0, text="대기 중... (다른 견적서 생성이 끝나면 시작됩니다)")
+    
+    if st.button("생성 취소", disabled=job.cancelled):
+        job.cancel()
+        st.rerun()
+
 # --- App Layout ---
 st.set_page_config(page_title="Multeo Quotation Generator", layout="wide")
 st.title("Multeo 견적서 생성기")
@@ -84,7 +125,18 @@ with tab1:
         total_estimate = edited_df['total'].sum()
         st.metric("총 견적 금액 (공급가액 합계)", f"{total_estimate:,} 원")
         
-        if st.button("견적서 엑셀 생성"):
+        include_thumbnails = st.checkbox("제품 썸네일 포함", value=False)
+        
+        # A finished quote only belongs to the inputs it was built from
+        quote_inputs = (recipient_name, include_thumbnails,
+                        edited_df[['name', 'unit_price', 'quantity']].to_json())
+        job = st.session_state.get("quote_job")
+        if job is not None and st.session_state.get("quote_inputs") != quote_inputs:
+            clear_quote_job()
+            job = None
+        job_running = job is not None and not job.done()
+        
+        if st.button("견적서 엑셀 생성", disabled=job_running):
             base_filename = f"견적서_{recipient_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             output_path = os.path.join("downloads", base_filename)
             os.makedirs("downloads", exist_ok=True)
@@ -98,17 +150,37 @@ with tab1:
                     "quantity": int(row['quantity'])
                 })
             
-            create_quotation(recipient_name, final_items, output_path)
-            
-            with open(output_path, "rb") as f:
-                st.download_button(
-                    label="📥 엑셀 파일 다운로드",
-                    data=f,
-                    file_name=base_filename,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+            # Render in the shared worker pool; this script run returns immediately
+            job = QuotationJob(get_executor(), recipient_name, final_items, output_path,
+                               include_thumbnails=include_thumbnails)
+            st.session_state.quote_job = job
+            st.session_state.quote_inputs = quote_inputs
+            # Most quotes finish in well under a second; only fall back to polling for big ones
+            job_running = not job.wait(QUICK_WAIT)
+        
+        if job_running:
+            show_job_progress()
+        elif job is not None:
+            try:
+                data = job.result()
+            except Exception as e:
+                st.error(f"견적서 생성 실패: {e}")
+                clear_quote_job()  # Shown once
+            else:
+                if data is None:
+                    st.warning("견적서 생성이 취소되었습니다.")
+                    clear_quote_job()
+                else:
+                    st.download_button(
+                        label="📥 엑셀 파일 다운로드",
+                        data=data,
+                        file_name=job.file_name,
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        on_click=clear_quote_job
+                    )
     else:
         st.info("품목을 추가해주세요.")
+        clear_quote_job()
 
 # --- Tab 2: Product Manager ---
 with tab2:
@@ -116,13 +188,26 @@ with tab2:
     
     current_products = load_products()
     df_products = pd.DataFrame(current_products)
+    if "image" not in df_products.columns:
+        df_products["image"] = ""
     
     st.write("아래 표에서 품목명과 가격을 직접 수정할 수 있습니다.")
+    st.caption("image 열에 이미지 경로 또는 URL을 넣으면 저장 후 백그라운드에서 썸네일이 생성됩니다.")
     edited_products_df = st.data_editor(df_products, num_rows="dynamic")
     
     if st.button("변경사항 저장"):
         # Convert back to list of dicts
         updated_products = edited_products_df.to_dict(orient="records")
+        # Don't write empty image cells back into products.json
+        for p in updated_products:
+            image = p.get("image")
+            if not isinstance(image, str) or not image.strip():
+                p.pop("image", None)
         save_products(updated_products)
+        # Image fetches can be slow (URLs), so build off the script thread.
+        # Only new or changed images are processed.
+        from scripts.thumbnail_cache import build_thumbnails
+        future = get_thumbnail_executor().submit(build_thumbnails, updated_products)
+        future.add_done_callback(log_thumbnail_failure)
         st.success("저장되었습니다!")
         st.rerun()
@@ -105,6 +105,14 @@ if __name__ == "__main__":
     output_path = "assets/products.json"
     os.makedirs("assets", exist_ok=True)
     
+    # Keep image paths/URLs entered by hand (used for thumbnails)
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            images = {p["name"]: p["image"] for p in json.load(f) if p.get("image")}
+        for p in products:
+            if p["name"] in images:
+                p["image"] = images[p["name"]]
+    
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(products, f, ensure_ascii=False, indent=2)
     
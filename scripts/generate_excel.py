@@ -5,9 +5,10 @@ from openpyxl.drawing.spreadsheet_drawing import AnchorMarker, OneCellAnchor
 from openpyxl.drawing.xdr import XDRPositiveSize2D
 from openpyxl.utils.units import pixels_to_EMU
 from datetime import datetime
+import io
 import os
 
-def create_quotation(recipient_name, items, output_path="quotation.xlsx"):
+def create_quotation(recipient_name, items, output_path="quotation.xlsx", include_thumbnails=False, progress=None):
     """
     Generates a quotation Excel file.
     
@@ -15,6 +16,11 @@ def create_quotation(recipient_name, items, output_path="quotation.xlsx"):
         recipient_name (str): Name of the recipient (e.g. "OOO 귀하")
         items (list): List of dicts with keys: 'name', 'quantity', 'unit_price'
         output_path (str): Path to save the Excel file
+        include_thumbnails (bool): Embed a product thumbnail in each item row
+            (from the cache built by scripts/thumbnail_cache.py)
+        progress (callable): Optional progress(done, total) hook, called after
+            each item row and after the save/cleanup steps. May raise to
+            abort generation.
     """
     wb = Workbook()
     ws = wb.active
@@ -189,6 +195,16 @@ def create_quotation(recipient_name, items, output_path="quotation.xlsx"):
     # --- Items Data ---
     start_row = 15
     current_row = start_row
+
+    # One step per item row, plus saving and the media cleanup
+    total_steps = len(items) + 2
+    if progress:
+        progress(0, total_steps)
+
+    thumb_index = None
+    if include_thumbnails:
+        from scripts.thumbnail_cache import load_index, get_thumbnail
+        thumb_index = load_index()
     
     for item in items:
         # Set row height for data rows
@@ -225,7 +241,30 @@ def create_quotation(recipient_name, items, output_path="quotation.xlsx"):
         
         ws.cell(row=current_row, column=9, value="") # Note
 
+        if thumb_index:
+            thumb = get_thumbnail(name, thumb_index)
+            if thumb:
+                try:
+                    img = Image(io.BytesIO(thumb))
+                    # Fit inside the 25pt (~33px) row, keeping aspect ratio
+                    scale = 30 / max(img.width, img.height)
+                    w = int(img.width * scale)
+                    h = int(img.height * scale)
+                    img.width = w
+                    img.height = h
+
+                    # Column C (Spec), roughly centered in the cell
+                    size = XDRPositiveSize2D(pixels_to_EMU(w), pixels_to_EMU(h))
+                    marker = AnchorMarker(col=2, colOff=pixels_to_EMU((75 - w) // 2), row=current_row - 1, rowOff=pixels_to_EMU(2))
+                    img.anchor = OneCellAnchor(_from=marker, ext=size)
+
+                    ws.add_image(img)
+                except Exception as e:
+                    print(f"Thumbnail error ({name}): {e}")
+
         current_row += 1
+        if progress:
+            progress(current_row - start_row, total_steps)
         
     # Fill remaining rows up to Header Row for Footer (footer_row)
     # The footer is at footer_row (31). We want to fill up to 30.
@@ -293,7 +332,17 @@ def create_quotation(recipient_name, items, output_path="quotation.xlsx"):
             except Exception as e2:
                 print(f"Could not load stamp: {e2}")
 
+    if progress:
+        progress(len(items), total_steps)
     wb.save(output_path)
+    if progress:
+        progress(len(items) + 1, total_steps)
+    if thumb_index:
+        # Repeated products would otherwise store the same image once per row
+        from scripts.thumbnail_cache import dedupe_workbook_media
+        dedupe_workbook_media(output_path)
+    if progress:
+        progress(total_steps, total_steps)
     print(f"Quotation saved to {output_path}")
 
 if __name__ == "__main__":
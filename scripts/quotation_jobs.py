@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import os
+import threading
+
+from scripts.generate_excel import create_quotation
+
+# --- Constants ---
+MAX_WORKERS = 2  # Quotes rendered at once across all users of the server
+QUICK_WAIT = 0.5  # Seconds a script run waits for a small quote before polling
+
+class QuotationCancelled(Exception):
+    """Raised inside a job when its cancel flag is set."""
+
+def create_executor(max_workers=MAX_WORKERS):
+    """
+    Bounded pool shared by every session of the app.
+
+    Threads cap concurrent renders but still share the GIL with Streamlit,
+    so a big quote can slow the server process; they don't isolate it.
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quotation")
+
+class QuotationJob:
+    """
+    Handle for a quotation being generated in the background.
+
+    Kept in Streamlit session state; the script run only polls it, so the
+    UI stays responsive while the workbook is built.
+    """
+
+    def __init__(self, executor, recipient_name, items, output_path, include_thumbnails=False):
+        self.output_path = output_path
+        self.file_name = os.path.basename(output_path)
+        self.done_steps = 0
+        self.total_steps = len(items) + 2  # Rows, save, cleanup
+        self._cancel = threading.Event()
+        self.future = executor.submit(self._run, recipient_name, items, include_thumbnails)
+
+    def _progress(self, done, total):
+        if self._cancel.is_set():
+            raise QuotationCancelled()
+        self.done_steps = done
+        self.total_steps = total
+
+    def _run(self, recipient_name, items, include_thumbnails):
+        try:
+            create_quotation(recipient_name, items, self.output_path,
+                             include_thumbnails=include_thumbnails, progress=self._progress)
+        except QuotationCancelled:
+            # Cancelled after the save: don't leave the file behind
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+            raise
+        with open(self.output_path, "rb") as f:
+            return f.read()
+
+    @property
+    def fraction(self):
+        if not self.total_steps:
+            return 0.0
+        return self.done_steps / self.total_steps
+
+    def cancel(self):
+        """Cancels a queued job outright, or stops a running one at the next step."""
+        self._cancel.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout):
+        """Blocks up to `timeout` seconds for the job to finish. Returns done()."""
+        wait([self.future], timeout=timeout)
+        return self.done()
+
+    def result(self):
+        """
+        Returns the finished .xlsx bytes, or None if the job was cancelled.
+        Errors from create_quotation are re-raised.
+        """
+        if self.future.cancelled():
+            return None
+        try:
+            return self.future.result()
+        except QuotationCancelled:
+            return None
@@ -0,0 +1,198 @@
+from PIL import Image as PILImage
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+
+# --- Constants ---
+THUMBNAIL_DIR = "assets/thumbnails"
+INDEX_FILE = os.path.join(THUMBNAIL_DIR, "index.json")
+THUMBNAIL_MAX_PX = 64  # Stored size (longest side). Rendered smaller in the sheet.
+JPEG_QUALITY = 80
+
+def load_index():
+    """Returns the {product name: {"source": image, "file": thumbnail file name}} mapping."""
+    if not os.path.exists(INDEX_FILE):
+        return {}
+    try:
+        with open(INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        # A broken index only costs thumbnails, never the quote itself
+        print(f"Could not read thumbnail index: {e}")
+        return {}
+
+def _write_atomic(path, data):
+    """
+    Writes bytes to a temp file and swaps it in: quotes rendering on worker
+    threads may be reading the cache at the same time.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def save_index(index):
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    data = json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8")
+    _write_atomic(INDEX_FILE, data)
+
+def _read_source(source):
+    """Reads raw image bytes from a local path or an http(s) URL."""
+    if source.startswith("http://") or source.startswith("https://"):
+        import requests
+        response = requests.get(source, timeout=10)
+        response.raise_for_status()
+        return response.content
+    with open(source, "rb") as f:
+        return f.read()
+
+def make_thumbnail(data):
+    """
+    Downscales raw image bytes to a compact thumbnail.
+
+    Images with transparency are kept as PNG, everything else becomes JPEG
+    (much smaller for product photos).
+
+    Returns:
+        tuple: (thumbnail bytes, file extension)
+    """
+    img = PILImage.open(io.BytesIO(data))
+    img.thumbnail((THUMBNAIL_MAX_PX, THUMBNAIL_MAX_PX))
+
+    out = io.BytesIO()
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha:
+        img.save(out, format="PNG", optimize=True)
+        ext = "png"
+    else:
+        img.convert("RGB").save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        ext = "jpeg"
+    return out.getvalue(), ext
+
+def build_thumbnails(products, force=False):
+    """
+    Builds the thumbnail cache for every product that has an "image" entry
+    (local path or URL).
+
+    Thumbnails are stored once per distinct source image, named by the
+    SHA-1 of the source bytes, so products sharing a photo share a file.
+    A product is rebuilt when its image source changes (or force=True).
+    `products` is the full product list: index entries for products that
+    are gone or no longer have an image are dropped.
+
+    Returns:
+        dict: The updated index.
+    """
+    old_index = load_index()
+    index = {}
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+
+    for prod in products:
+        name = prod.get("name")
+        source = prod.get("image")
+        if not name or not isinstance(source, str) or not source:
+            continue
+
+        entry = old_index.get(name)
+        if (not force and isinstance(entry, dict) and entry.get("source") == source
+                and os.path.exists(os.path.join(THUMBNAIL_DIR, entry["file"]))):
+            index[name] = entry
+            continue
+
+        try:
+            data = _read_source(source)
+        except Exception as e:
+            print(f"Could not read image for {name}: {e}")
+            continue
+
+        digest = hashlib.sha1(data).hexdigest()
+        existing = [f for f in os.listdir(THUMBNAIL_DIR) if f.startswith(digest + ".")]
+        if existing:
+            index[name] = {"source": source, "file": existing[0]}
+            continue
+
+        try:
+            thumb, ext = make_thumbnail(data)
+        except Exception as e:
+            print(f"Could not build thumbnail for {name}: {e}")
+            continue
+
+        filename = f"{digest}.{ext}"
+        _write_atomic(os.path.join(THUMBNAIL_DIR, filename), thumb)
+        index[name] = {"source": source, "file": filename}
+        print(f"Thumbnail: {name} -> {filename}")
+
+    save_index(index)
+    return index
+
+def get_thumbnail(name, index=None):
+    """
+    Returns the cached thumbnail bytes for a product, or None if it has none.
+    """
+    if index is None:
+        index = load_index()
+    entry = index.get(name)
+    if not isinstance(entry, dict):
+        return None
+    filename = entry["file"]
+    path = os.path.join(THUMBNAIL_DIR, filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+def dedupe_workbook_media(xlsx_path):
+    """
+    Rewrites a saved .xlsx so identical images are stored only once.
+
+    openpyxl writes one xl/media file per placed image, even when the
+    bytes are identical. This keeps the first copy of each image and
+    points every drawing relationship at it. The result is written to a
+    temp file and swapped in, so an interrupted rewrite never leaves a
+    corrupt workbook behind.
+    """
+    with zipfile.ZipFile(xlsx_path, "r") as zin:
+        entries = [(info, zin.read(info.filename)) for info in zin.infolist()]
+
+    # Map duplicate media paths to the first path with the same content
+    seen = {}
+    replace = {}
+    for info, data in entries:
+        if not info.filename.startswith("xl/media/"):
+            continue
+        digest = hashlib.sha1(data).hexdigest()
+        if digest in seen:
+            replace[info.filename] = seen[digest]
+        else:
+            seen[digest] = info.filename
+
+    if not replace:
+        return
+
+    pattern = re.compile("|".join(re.escape("/" + path) for path in replace))
+    tmp_path = xlsx_path + ".tmp"
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info, data in entries:
+                if info.filename in replace:
+                    continue
+                if info.filename.startswith("xl/drawings/_rels/"):
+                    text = data.decode("utf-8")
+                    text = pattern.sub(lambda m: "/" + replace[m.group(0)[1:]], text)
+                    data = text.encode("utf-8")
+                zout.writestr(info, data)
+        os.replace(tmp_path, xlsx_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+if __name__ == "__main__":
+    products_file = "assets/products.json"
+    with open(products_file, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    index = build_thumbnails(products)
+    print(f"{len(index)} products have thumbnails in {THUMBNAIL_DIR}")